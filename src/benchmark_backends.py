@@ -0,0 +1,180 @@
+"""Benchmark dos backends de feature engineering (pandas vs DuckDB).
+
+Gera um histórico sintético com o esquema de base_pagamentos (após
+create_target) direto em parquet pelo DuckDB, verifica a paridade entre os
+backends numa amostra pequena e mede o tempo de build_full_feature_matrix
+para cada tamanho de histórico.
+
+Uso:
+    python -m src.benchmark_backends --rows 1000000 10000000 50000000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+import duckdb
+import numpy as np
+import pandas as pd
+from src.config import DEFAULT_THRESHOLD_DAYS, RANDOM_SEED
+from src.feature_engineering import build_full_feature_matrix
+from src.feature_engineering_sql import assert_backend_parity
+
+N_SAFRAS = 40
+ROWS_PER_CLIENT = 60  # proporção aproximada da base de desenvolvimento
+N_SAFRAS_TRANSACOES = 6  # transações a featurizar vêm das últimas safras
+
+
+def generate_history(path, n_rows):
+    """Escreve histórico sintético em parquet. Retorna o número de clientes.
+
+    Como na base real, parte de VALOR_A_PAGAR e DATA_PAGAMENTO é nula. O
+    TARGET segue a regra de create_target (atraso >= DEFAULT_THRESHOLD_DAYS) e
+    os dtypes são os de create_target (DIAS_ATRASO e TAXA em float).
+    """
+    n_clients = max(n_rows // ROWS_PER_CLIENT, 1)
+    con = duckdb.connect()
+    con.execute(f"SELECT setseed({RANDOM_SEED / 100})")
+    con.execute(f"""
+        COPY (
+            SELECT
+                ID_CLIENTE, SAFRA_REF, DATA_EMISSAO_DOCUMENTO,
+                DATA_EMISSAO_DOCUMENTO + prazo AS DATA_VENCIMENTO,
+                DATA_EMISSAO_DOCUMENTO + prazo + to_days(atraso) AS DATA_PAGAMENTO,
+                VALOR_A_PAGAR, TAXA,
+                atraso::DOUBLE AS DIAS_ATRASO,
+                coalesce(atraso >= {DEFAULT_THRESHOLD_DAYS}, false)::INTEGER AS TARGET
+            FROM (
+                SELECT
+                    (random() * {n_clients})::BIGINT AS ID_CLIENTE,
+                    (DATE '2018-08-01' + to_months((i % {N_SAFRAS})::INTEGER))::TIMESTAMP AS SAFRA_REF,
+                    SAFRA_REF + to_days((random() * 27)::INTEGER) AS DATA_EMISSAO_DOCUMENTO,
+                    to_days((5 + random() * 55)::INTEGER) AS prazo,
+                    CASE WHEN random() >= 0.02
+                        THEN (floor(-10 + 30 * random() * random()))::INTEGER
+                    END AS atraso,
+                    CASE WHEN random() >= 0.015
+                        THEN round(100 + random() * 50000, 2)
+                    END AS VALOR_A_PAGAR,
+                    ([4.99, 5.99, 6.99, 8.99, 11.99][1 + floor(random() * 5)::INTEGER])::DOUBLE AS TAXA
+                FROM range({n_rows}) t(i)
+            )
+        ) TO '{Path(path).as_posix()}' (FORMAT PARQUET)
+    """)
+    con.close()
+    return n_clients
+
+
+def load_inputs(path, n_clients, n_transactions):
+    """Transações a featurizar, cadastral e info sintéticos.
+
+    As transações vêm das últimas N_SAFRAS_TRANSACOES safras (com histórico
+    antes e depois delas), embaralhadas e com índice não sequencial. A seleção é ordenada para ser
+    determinística mesmo com o DuckDB multi-thread. Parte dos
+    clientes fica fora do cadastral e parte dos pares cliente-safra fora do info.
+    """
+    rng = np.random.default_rng(RANDOM_SEED)
+    source = f"read_parquet('{Path(path).as_posix()}')"
+    transactions = duckdb.query(f"""
+        SELECT * EXCLUDE (DIAS_ATRASO, TARGET, DATA_PAGAMENTO)
+        FROM {source}
+        WHERE SAFRA_REF > (SELECT max(SAFRA_REF) FROM {source})
+            - to_months({N_SAFRAS_TRANSACOES})
+        ORDER BY ALL
+        LIMIT {n_transactions}
+    """).df()
+    for col in ["SAFRA_REF", "DATA_EMISSAO_DOCUMENTO", "DATA_VENCIMENTO"]:
+        transactions[col] = transactions[col].astype("datetime64[ns]")
+    transactions = transactions.sample(frac=1, random_state=RANDOM_SEED)
+    transactions.index = transactions.index * 3 + 7
+
+    ids = np.arange(n_clients + 1)
+    ids = ids[rng.random(len(ids)) >= 0.02]
+    cadastral = pd.DataFrame({
+        "ID_CLIENTE": ids,
+        "DATA_CADASTRO": pd.Timestamp("2010-01-01")
+        + pd.to_timedelta(rng.integers(0, 3000, len(ids)), unit="D"),
+        "DDD": rng.choice([11, 21, 31, 41, 51, 61, 71, 81, 91], len(ids)),
+        "CEP_2_DIG": rng.integers(10, 99, len(ids)),
+        "PORTE": rng.choice(["PEQUENO", "MEDIO", "GRANDE"], len(ids)),
+        "SEGMENTO_INDUSTRIAL": rng.choice(["Comércio", "Serviços", "Indústria"], len(ids)),
+        "DOMINIO_EMAIL": rng.choice(["GMAIL", "YAHOO", "HOTMAIL"], len(ids)),
+    })
+    safras = np.sort(transactions["SAFRA_REF"].unique())
+    info = pd.DataFrame({
+        "ID_CLIENTE": np.repeat(ids, len(safras)),
+        "SAFRA_REF": np.tile(safras, len(ids)),
+    })
+    info = info[rng.random(len(info)) >= 0.1].reset_index(drop=True)
+    info["RENDA_MES_ANTERIOR"] = np.where(
+        rng.random(len(info)) < 0.05, np.nan, rng.gamma(2, 1e5, len(info))
+    )
+    info["NO_FUNCIONARIOS"] = rng.integers(50, 200, len(info)).astype(float)
+    return transactions, cadastral, info
+
+
+def _timed(backend, transactions, history, cadastral, info):
+    t0 = time.perf_counter()
+    build_full_feature_matrix(transactions, history, cadastral, info,
+                              verbose=False, backend=backend)
+    return time.perf_counter() - t0
+
+
+def run_benchmark(row_counts, n_transactions=50_000, pandas_max_rows=1_000_000,
+                  parity_rows=50_000):
+    """Mede o tempo dos backends para cada tamanho de histórico.
+
+    Args:
+        row_counts: Tamanhos de histórico (linhas de pagamento)
+        n_transactions: Transações a featurizar (últimas safras)
+        pandas_max_rows: Maior histórico em que o backend pandas é executado
+        parity_rows: Tamanho do histórico usado na verificação de paridade
+
+    Returns:
+        DataFrame com tempos (s) por backend e tamanho
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "parity.parquet"
+        n_clients = generate_history(path, parity_rows)
+        transactions, cadastral, info = load_inputs(path, n_clients, n_transactions)
+        history = duckdb.read_parquet(str(path)).df()
+        assert_backend_parity(transactions, history, cadastral, info)
+        print(f"Paridade pandas x duckdb OK ({parity_rows:,} linhas de histórico)")
+
+        for n_rows in row_counts:
+            path = Path(tmp) / f"history_{n_rows}.parquet"
+            n_clients = generate_history(path, n_rows)
+            transactions, cadastral, info = load_inputs(path, n_clients, n_transactions)
+
+            row = {"linhas_historico": n_rows, "transacoes": len(transactions)}
+            row["duckdb_s"] = _timed("duckdb", transactions, path, cadastral, info)
+            if n_rows <= pandas_max_rows:
+                history = duckdb.read_parquet(str(path)).df()
+                row["pandas_s"] = _timed("pandas", transactions, history, cadastral, info)
+                del history
+            else:
+                row["pandas_s"] = np.nan
+            results.append(row)
+            pandas_txt = "-" if np.isnan(row["pandas_s"]) else f"{row['pandas_s']:.1f}s"
+            print(f"  {n_rows:>12,} linhas: duckdb {row['duckdb_s']:.1f}s, pandas {pandas_txt}")
+            path.unlink()
+
+    df = pd.DataFrame(results)
+    df["speedup"] = df["pandas_s"] / df["duckdb_s"]
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+",
+                        default=[1_000_000, 10_000_000, 50_000_000])
+    parser.add_argument("--transactions", type=int, default=50_000)
+    parser.add_argument("--pandas-max-rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = run_benchmark(args.rows, args.transactions, args.pandas_max_rows)
+    print(df.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
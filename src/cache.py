@@ -0,0 +1,211 @@
+"""Cache em disco para etapas do pipeline de features (memoização por conteúdo)."""
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import time
+import types
+from pathlib import Path
+import pandas as pd
+from src.config import CACHE_DIR, CACHE_MAX_BYTES
+
+
+def fingerprint_frame(df):
+    """Gera hash do conteúdo de um DataFrame (valores, índice, colunas e dtypes)."""
+    h = hashlib.sha256()
+    h.update(json.dumps([str(c) for c in df.columns]).encode())
+    h.update(json.dumps([str(t) for t in df.dtypes]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return h.hexdigest()
+
+
+def _code_names(code):
+    """Nomes globais usados por um code object, incluindo os aninhados
+    (compreensões, lambdas e funções internas)."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+
+def _function_source(func, _seen=None):
+    """Código-fonte da função e das funções do projeto (src) que ela chama.
+
+    Assim, alterar um helper (ex: _calc_window_features) invalida o cache da
+    etapa que o utiliza.
+    """
+    package = func.__module__.split(".")[0]
+    seen = _seen if _seen is not None else set()
+    if func in seen:
+        return ""
+    seen.add(func)
+
+    parts = [inspect.getsource(func)]
+    for name in sorted(_code_names(func.__code__)):
+        ref = func.__globals__.get(name)
+        if isinstance(ref, types.FunctionType) and ref.__module__.split(".")[0] == package:
+            parts.append(_function_source(ref, seen))
+    return "\n".join(parts)
+
+
+def _fingerprint_arg(arg):
+    if isinstance(arg, pd.DataFrame):
+        return fingerprint_frame(arg)
+    if isinstance(arg, (str, Path)) and Path(arg).is_file():
+        # Arquivos (ex: histórico em parquet): caminho + tamanho + data de modificação
+        st = Path(arg).stat()
+        return f"{Path(arg).resolve()}:{st.st_size}:{st.st_mtime_ns}"
+    return repr(arg)
+
+
+class StageCache:
+    """Cache em disco com orçamento de tamanho e descarte LRU.
+
+    Cada entrada é indexada pelo hash dos DataFrames de entrada, das constantes
+    de configuração relevantes e do código-fonte da função da etapa.
+
+    Args:
+        cache_dir: Diretório do cache (padrão: CACHE_DIR)
+        max_bytes: Tamanho máximo em disco; entradas menos usadas recentemente
+            são removidas ao exceder (padrão: CACHE_MAX_BYTES)
+        verbose: Se True, imprime hits/misses
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None, verbose=True):
+        self.cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else CACHE_MAX_BYTES
+        self.verbose = verbose
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.stats = {}
+
+    def _key(self, func, args, config):
+        h = hashlib.sha256()
+        # Pickles de DataFrame não são portáveis entre versões do pandas
+        h.update(pd.__version__.encode())
+        h.update(func.__qualname__.encode())
+        h.update(_function_source(func).encode())
+        h.update(json.dumps(config or {}, sort_keys=True, default=str).encode())
+        for arg in args:
+            h.update(_fingerprint_arg(arg).encode())
+        return h.hexdigest()
+
+    def _stage_stats(self, name):
+        return self.stats.setdefault(name, {
+            "hits": 0, "misses": 0, "compute_s": 0.0, "hash_s": 0.0,
+            "load_s": 0.0, "write_s": 0.0, "saved_s": 0.0,
+        })
+
+    def _load(self, path):
+        """Lê uma entrada; entradas corrompidas ou incompatíveis são removidas."""
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError,
+                IndexError, TypeError, ValueError):
+            path.unlink(missing_ok=True)
+            return None
+
+    def run(self, func, *args, config=None):
+        """Executa func(*args), reaproveitando o resultado em disco se existir.
+
+        Args:
+            func: Função da etapa
+            *args: Argumentos posicionais (DataFrames são indexados pelo conteúdo)
+            config: Dict com constantes que afetam o resultado da etapa
+        """
+        name = f"{func.__module__}.{func.__qualname__}"
+        stage = self._stage_stats(name)
+
+        # O hash das entradas (ex: histórico completo) também é custo do cache
+        t0 = time.perf_counter()
+        path = self.cache_dir / f"{self._key(func, args, config)}.pkl"
+        hash_s = time.perf_counter() - t0
+        stage["hash_s"] += hash_s
+        overhead_s = hash_s
+
+        if path.exists():
+            t0 = time.perf_counter()
+            entry = self._load(path)
+            load_s = time.perf_counter() - t0
+            stage["load_s"] += load_s
+            if entry is not None:
+                compute_s, result = entry
+                # Atualiza mtime para a política LRU
+                os.utime(path)
+                saved_s = compute_s - load_s - hash_s
+                stage["hits"] += 1
+                stage["saved_s"] += saved_s
+                if self.verbose:
+                    print(f"  [cache] {name}: hit ({hash_s + load_s:.2f}s, economia {saved_s:.2f}s)")
+                return result
+            # Entrada ilegível: recalcula como miss
+            overhead_s += load_s
+            if self.verbose:
+                print(f"  [cache] {name}: entrada corrompida removida")
+
+        t0 = time.perf_counter()
+        result = func(*args)
+        compute_s = time.perf_counter() - t0
+        stage["misses"] += 1
+        stage["compute_s"] += compute_s
+
+        # Serializa em memória uma única vez: entradas maiores que o orçamento
+        # não chegam ao disco (nem descartam as demais)
+        t0 = time.perf_counter()
+        data = pickle.dumps((compute_s, result), protocol=pickle.HIGHEST_PROTOCOL)
+        stored = len(data) <= self.max_bytes
+        if stored:
+            # Escrita atômica: evita entradas corrompidas se o processo for interrompido
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+            self._evict()
+        del data
+        write_s = time.perf_counter() - t0
+        stage["write_s"] += write_s
+        # Miss: hash, serialização, escrita e descarte são custo puro
+        stage["saved_s"] -= overhead_s + write_s
+
+        if self.verbose:
+            note = "" if stored else ", resultado maior que max_bytes"
+            print(f"  [cache] {name}: miss ({compute_s:.2f}s{note})")
+        return result
+
+    def _evict(self):
+        """Remove entradas menos usadas recentemente até caber em max_bytes."""
+        entries = sorted(self.cache_dir.glob("*.pkl"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in entries)
+        for p in entries:
+            if total <= self.max_bytes:
+                break
+            total -= p.stat().st_size
+            p.unlink(missing_ok=True)
+
+    def size_bytes(self):
+        """Tamanho atual do cache em disco."""
+        return sum(p.stat().st_size for p in self.cache_dir.glob("*.pkl"))
+
+    def clear(self):
+        """Remove todas as entradas do cache."""
+        for p in self.cache_dir.glob("*.pkl"):
+            p.unlink(missing_ok=True)
+
+    def summary(self):
+        """Estatísticas de hit/miss e tempo economizado por etapa.
+
+        saved_s é o tempo de cálculo evitado nos hits menos todo o custo do
+        cache: hash das entradas (hash_s), leitura (load_s) e, nos misses,
+        serialização, escrita e descarte LRU (write_s).
+
+        Returns:
+            DataFrame com uma linha por etapa e uma linha TOTAL
+        """
+        df = pd.DataFrame(self.stats).T
+        if df.empty:
+            return df
+        df.loc["TOTAL"] = df.sum()
+        df[["hits", "misses"]] = df[["hits", "misses"]].astype(int)
+        df["hit_rate"] = df["hits"] / (df["hits"] + df["misses"])
+        return df
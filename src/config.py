@@ -6,6 +6,8 @@ PROJECT_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = PROJECT_DIR / "data"
 OUTPUT_DIR = PROJECT_DIR / "outputs"
 FIGURES_DIR = OUTPUT_DIR / "figures"
+CACHE_DIR = OUTPUT_DIR / "cache"
+DUCKDB_TEMP_DIR = OUTPUT_DIR / "duckdb_tmp"
 NOTEBOOKS_DIR = PROJECT_DIR / "notebooks"
 
 # Garantir que diretórios existem
@@ -107,3 +109,10 @@ NUMERIC_FEATURES_BASE = [
 # Período COVID para feature indicadora
 COVID_START = "2020-02"
 COVID_END = "2020-06"
+
+# Cache em disco das etapas de feature engineering (opt-in)
+CACHE_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+
+# Backend DuckDB de feature engineering
+DUCKDB_THREADS = None        # None = todos os núcleos
+DUCKDB_MEMORY_LIMIT = "4GB"  # acima disso, spill para DUCKDB_TEMP_DIR
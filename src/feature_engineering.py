@@ -8,11 +8,36 @@ from src.config import (
 )
 
 
-def create_target(df):
+def _stage_config():
+    """Constantes de config que afetam o resultado das etapas (chave do cache)."""
+    return {
+        "HIST_WINDOWS": HIST_WINDOWS,
+        "DEFAULT_THRESHOLD_DAYS": DEFAULT_THRESHOLD_DAYS,
+        "COVID_START": COVID_START,
+        "COVID_END": COVID_END,
+        "DDD_REGIAO": DDD_REGIAO,
+    }
+
+
+def _run_stage(cache, func, *args):
+    """Executa uma etapa, via StageCache se fornecido."""
+    if cache is None:
+        return func(*args)
+    return cache.run(func, *args, config=_stage_config())
+
+
+def create_target(df, cache=None):
     """Calcula variável target de inadimplência.
 
     Inadimplência = pagamento com 5+ dias de atraso em relação ao vencimento.
+
+    Args:
+        df: DataFrame de pagamentos
+        cache: StageCache opcional para memoizar o resultado em disco
     """
+    if cache is not None:
+        return _run_stage(cache, create_target, df)
+
     df = df.copy()
     df["DIAS_ATRASO"] = (df["DATA_PAGAMENTO"] - df["DATA_VENCIMENTO"]).dt.days
     df["TARGET"] = (df["DIAS_ATRASO"] >= DEFAULT_THRESHOLD_DAYS).astype(int)
@@ -186,6 +211,11 @@ def build_cadastral_features(df, cadastral):
     # Merge
     df = df.merge(cadastral, on="ID_CLIENTE", how="left")
 
+    return _derive_cadastral_features(df)
+
+
+def _derive_cadastral_features(df):
+    """Features derivadas das colunas cadastrais já mescladas (altera df)."""
     # Tempo de cadastro em meses
     df["TEMPO_CADASTRO_MESES"] = (
         (df["SAFRA_REF"].dt.year - df["DATA_CADASTRO"].dt.year) * 12
@@ -216,6 +246,11 @@ def build_info_features(df, info):
     # Merge por cliente e safra
     df = df.merge(info, on=["ID_CLIENTE", "SAFRA_REF"], how="left")
 
+    return _derive_info_features(df)
+
+
+def _derive_info_features(df):
+    """Features derivadas das colunas de info mensal já mescladas (altera df)."""
     # Flags de missing
     df["RENDA_MISSING"] = df["RENDA_MES_ANTERIOR"].isna().astype(int)
     df["FUNC_MISSING"] = df["NO_FUNCIONARIOS"].isna().astype(int)
@@ -226,7 +261,20 @@ def build_info_features(df, info):
     return df
 
 
-def build_full_feature_matrix(transactions_df, history_df, cadastral, info, verbose=True):
+def _backend_stages(backend):
+    """Funções de etapa (safra, cadastral, info, comportamental) de cada backend."""
+    if backend == "pandas":
+        return (build_safra_context_features, build_cadastral_features,
+                build_info_features, build_behavioral_features)
+    if backend == "duckdb":
+        from src import feature_engineering_sql as sql
+        return (sql.build_safra_context_features, sql.build_cadastral_features,
+                sql.build_info_features, sql.build_behavioral_features)
+    raise ValueError(f"Backend desconhecido: {backend!r} (use 'pandas' ou 'duckdb')")
+
+
+def build_full_feature_matrix(transactions_df, history_df, cadastral, info, verbose=True,
+                              cache=None, backend="pandas"):
     """Orquestrador: constrói a matriz completa de features.
 
     Args:
@@ -235,29 +283,37 @@ def build_full_feature_matrix(transactions_df, history_df, cadastral, info, verb
         cadastral: Base cadastral (já limpa)
         info: Base info mensal
         verbose: Se True, imprime progresso
+        cache: StageCache opcional; cada etapa é memoizada em disco pelo
+            conteúdo das entradas, constantes de config e código da função
+        backend: "pandas" (padrão) ou "duckdb" (consultas SQL com window
+            functions, multi-thread e com spill em disco; ver
+            src/feature_engineering_sql.py). Com "duckdb", history_df também
+            pode ser o caminho de um arquivo parquet/csv
 
     Returns:
         DataFrame com todas as features
     """
+    safra_stage, cadastral_stage, info_stage, behavioral_stage = _backend_stages(backend)
+
     if verbose:
         print("1/5 Features transacionais...")
-    df = build_transaction_features(transactions_df)
+    df = _run_stage(cache, build_transaction_features, transactions_df)
 
     if verbose:
         print("2/5 Features de contexto da safra...")
-    df = build_safra_context_features(df)
+    df = _run_stage(cache, safra_stage, df)
 
     if verbose:
         print("3/5 Features cadastrais...")
-    df = build_cadastral_features(df, cadastral)
+    df = _run_stage(cache, cadastral_stage, df, cadastral)
 
     if verbose:
         print("4/5 Features de info mensal...")
-    df = build_info_features(df, info)
+    df = _run_stage(cache, info_stage, df, info)
 
     if verbose:
         print("5/5 Features comportamentais (pode demorar)...")
-    behavioral = build_behavioral_features(df, history_df)
+    behavioral = _run_stage(cache, behavioral_stage, df, history_df)
     df = df.join(behavioral)
 
     if verbose:
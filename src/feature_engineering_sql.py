@@ -0,0 +1,301 @@
+"""Backend DuckDB para as etapas de feature engineering.
+
+Mesmas features de src/feature_engineering.py, expressas como consultas SQL
+(window functions) executadas in-process pelo DuckDB, com paralelismo e spill
+em disco (DUCKDB_TEMP_DIR) quando o limite de memória é atingido.
+
+As funções de etapa têm a mesma assinatura das versões pandas e são
+selecionadas por build_full_feature_matrix(..., backend="duckdb").
+
+Premissa: SAFRA_REF é sempre o primeiro dia do mês (como em data_loader), de
+modo que as janelas em meses viram intervalos sobre o índice ano*12+mês.
+"""
+import os
+from pathlib import Path
+import duckdb
+import numpy as np
+import pandas as pd
+from src.config import (
+    HIST_WINDOWS, DUCKDB_THREADS, DUCKDB_MEMORY_LIMIT, DUCKDB_TEMP_DIR
+)
+from src.feature_engineering import _derive_cadastral_features, _derive_info_features
+
+_CONNECTION = None
+
+
+def configure_duckdb(threads=None, memory_limit=None, temp_dir=None):
+    """(Re)cria a conexão DuckDB usada pelo backend.
+
+    Args:
+        threads: Número de threads (padrão: DUCKDB_THREADS ou todos os núcleos)
+        memory_limit: Limite de memória, ex: "8GB" (padrão: DUCKDB_MEMORY_LIMIT)
+        temp_dir: Diretório de spill em disco (padrão: DUCKDB_TEMP_DIR)
+
+    Returns:
+        Conexão DuckDB in-memory configurada
+    """
+    global _CONNECTION
+    threads = threads or DUCKDB_THREADS or os.cpu_count()
+    memory_limit = memory_limit or DUCKDB_MEMORY_LIMIT
+    temp_dir = Path(temp_dir or DUCKDB_TEMP_DIR)
+    temp_dir.mkdir(parents=True, exist_ok=True)
+
+    con = duckdb.connect(database=":memory:")
+    con.execute(f"SET threads = {int(threads)}")
+    con.execute(f"SET memory_limit = '{memory_limit}'")
+    con.execute(f"SET temp_directory = '{temp_dir.as_posix()}'")
+    # A ordem de saída é garantida por ORDER BY explícito
+    con.execute("SET preserve_insertion_order = false")
+
+    if _CONNECTION is not None:
+        _CONNECTION.close()
+    _CONNECTION = con
+    return con
+
+
+def _connection():
+    if _CONNECTION is None:
+        configure_duckdb()
+    return _CONNECTION
+
+
+def _query(sql, **frames):
+    """Executa sql com os DataFrames de frames registrados como tabelas."""
+    con = _connection()
+    for name, frame in frames.items():
+        con.register(name, frame)
+    try:
+        return con.execute(sql).df()
+    finally:
+        for name in frames:
+            con.unregister(name)
+
+
+def _history_source(history):
+    """Expressão FROM para o histórico: DataFrame registrado ou arquivo local."""
+    if isinstance(history, pd.DataFrame):
+        return "history", {"history": history}
+    path = Path(history).as_posix().replace("'", "''")
+    if path.endswith(".csv"):
+        return f"read_csv_auto('{path}')", {}
+    return f"read_parquet('{path}')", {}
+
+
+def _left_join(df, right, on):
+    """LEFT JOIN equivalente a df.merge(right, on=on, how="left").
+
+    O DuckDB resolve o casamento de chaves; as colunas são reunidas no pandas
+    para preservar os dtypes do merge original. Como no merge do pandas,
+    chaves nulas (NaN/NaT) casam entre si.
+    """
+    left_keys = df[on].assign(_row=np.arange(len(df)))
+    right_keys = right[on].assign(_row=np.arange(len(right)))
+    cond = " AND ".join(f'l."{c}" IS NOT DISTINCT FROM r."{c}"' for c in on)
+
+    rows = _query(
+        f"""
+        SELECT l._row AS _lrow, r._row AS _rrow
+        FROM left_keys l LEFT JOIN right_keys r ON {cond}
+        ORDER BY _lrow, _rrow
+        """,
+        left_keys=left_keys, right_keys=right_keys,
+    )
+
+    left_part = df.iloc[rows["_lrow"].to_numpy()].reset_index(drop=True)
+    right_idx = rows["_rrow"].fillna(-1).astype(int).to_numpy()
+    right_part = (
+        right.drop(columns=on).reset_index(drop=True).reindex(right_idx).reset_index(drop=True)
+    )
+    return pd.concat([left_part, right_part], axis=1)
+
+
+def build_safra_context_features(df):
+    """Features de contexto do mês/safra (window functions por cliente-safra)."""
+    df = df.reset_index(drop=True)
+    keys = df[["ID_CLIENTE", "SAFRA_REF", "VALOR_A_PAGAR"]].assign(_row=np.arange(len(df)))
+
+    # groupby do pandas descarta chaves nulas: essas linhas ficam sem contexto
+    valid = "ID_CLIENTE IS NOT NULL AND SAFRA_REF IS NOT NULL"
+    ctx = _query(
+        f"""
+        SELECT
+            CASE WHEN {valid} THEN count(VALOR_A_PAGAR) OVER w END AS QTD_TRANSACOES_MES,
+            -- pandas soma grupos só com nulos como 0
+            CASE WHEN {valid} THEN coalesce(sum(VALOR_A_PAGAR) OVER w, 0) END AS SOMA_VALOR_MES,
+            CASE WHEN {valid} THEN avg(VALOR_A_PAGAR) OVER w END AS MEDIA_VALOR_MES,
+            CASE WHEN {valid} THEN max(VALOR_A_PAGAR) OVER w END AS MAX_VALOR_MES
+        FROM keys
+        WINDOW w AS (PARTITION BY ID_CLIENTE, SAFRA_REF)
+        ORDER BY _row
+        """,
+        keys=keys,
+    )
+    # Mesmo dtype do merge no pandas: contagem vira float quando há nulos
+    qtd = ctx["QTD_TRANSACOES_MES"]
+    ctx["QTD_TRANSACOES_MES"] = qtd.astype("float64" if qtd.isna().any() else "int64")
+    return pd.concat([df, ctx], axis=1)
+
+
+def build_cadastral_features(df, cadastral):
+    """Join com dados cadastrais (DuckDB) e criação de features derivadas."""
+    df = _left_join(df, cadastral, ["ID_CLIENTE"])
+    return _derive_cadastral_features(df)
+
+
+def build_info_features(df, info):
+    """Join com dados de info mensal (DuckDB) e features derivadas."""
+    df = _left_join(df, info, ["ID_CLIENTE", "SAFRA_REF"])
+    return _derive_info_features(df)
+
+
+def _window_sql(suffix, n_months):
+    """Agregados e features de uma janela; n_months=None para todo o histórico."""
+    start = "UNBOUNDED" if n_months is None else str(int(n_months))
+    frame = (
+        f"PARTITION BY ID_CLIENTE ORDER BY m RANGE BETWEEN {start} PRECEDING AND 1 PRECEDING"
+    )
+    p, a = f"HIST_{suffix}", f"agg_{suffix}"
+    sums = ", ".join(
+        f"sum({c}) OVER ({frame}) AS {a}_{c}"
+        for c in ["n", "n_atr", "s_atr", "s2_atr", "s_tgt", "n_val", "s_val", "n_adi"]
+    )
+    aggs = f"{sums}, max(max_atr) OVER ({frame}) AS {a}_max_atr"
+
+    feats = f"""
+        {a}_s_tgt / {a}_n AS {p}_TX_DEFAULT,
+        {a}_s_atr / NULLIF({a}_n_atr, 0) AS {p}_MEDIA_ATRASO,
+        {a}_max_atr AS {p}_MAX_ATRASO,
+        CASE
+            WHEN {a}_n = 1 THEN 0
+            WHEN {a}_n_atr > 1 THEN sqrt(greatest(
+                ({a}_s2_atr - {a}_s_atr * {a}_s_atr / {a}_n_atr) / ({a}_n_atr - 1), 0))
+        END AS {p}_STD_ATRASO,
+        {a}_n AS {p}_QTD_TRANS,
+        {a}_s_val / NULLIF({a}_n_val, 0) AS {p}_MEDIA_VALOR,
+        CASE WHEN {a}_n > 0 THEN coalesce({a}_s_val, 0) END AS {p}_SOMA_VALOR,
+        {a}_n_adi / {a}_n AS {p}_RATIO_ADIANTADO"""
+    return aggs, feats
+
+
+def build_behavioral_features(transactions_df, history_df):
+    """Constrói features comportamentais com window functions no DuckDB.
+
+    O histórico é agregado por (cliente, mês) e as janelas ALL/3M/6M/12M são
+    frames RANGE sobre o índice do mês, sempre terminando no mês anterior à
+    safra (sem leakage).
+
+    Args:
+        transactions_df: DataFrame com transações que queremos featurizar
+        history_df: Histórico de pagamentos (deve ter TARGET e DIAS_ATRASO);
+            DataFrame ou caminho de arquivo parquet/csv local
+
+    Returns:
+        DataFrame com features comportamentais indexado igual a transactions_df
+    """
+    source, frames = _history_source(history_df)
+    keys = transactions_df[["ID_CLIENTE", "SAFRA_REF"]].assign(
+        _row=np.arange(len(transactions_df))
+    )
+
+    windows = [("ALL", None)] + [(f"{w}M", w) for w in HIST_WINDOWS]
+    window_sql = [_window_sql(suffix, n) for suffix, n in windows]
+    aggs = ",\n".join(a for a, _ in window_sql)
+    feats = ",\n".join(f for _, f in window_sql)
+    all_frame = "PARTITION BY ID_CLIENTE ORDER BY m RANGE BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING"
+
+    behavioral = _query(
+        f"""
+        WITH monthly AS (
+            SELECT
+                ID_CLIENTE,
+                year(SAFRA_REF) * 12 + month(SAFRA_REF) AS m,
+                count(*) AS n,
+                count(DIAS_ATRASO) AS n_atr,
+                sum(DIAS_ATRASO::DOUBLE) AS s_atr,
+                sum(DIAS_ATRASO::DOUBLE * DIAS_ATRASO) AS s2_atr,
+                max(DIAS_ATRASO::DOUBLE) AS max_atr,
+                sum(TARGET::DOUBLE) AS s_tgt,
+                avg(TARGET::DOUBLE) AS tx_mes,
+                count(VALOR_A_PAGAR) AS n_val,
+                sum(VALOR_A_PAGAR::DOUBLE) AS s_val,
+                sum(CASE WHEN DIAS_ATRASO < 0 THEN 1 ELSE 0 END) AS n_adi,
+                row_number() OVER (PARTITION BY ID_CLIENTE ORDER BY m) - 1 AS x
+            FROM {source}
+            -- Só clientes a featurizar: o grid de janelas não cresce com o histórico todo
+            WHERE ID_CLIENTE IN (SELECT ID_CLIENTE FROM keys)
+            GROUP BY ID_CLIENTE, m
+        ),
+        pairs AS (
+            SELECT DISTINCT ID_CLIENTE, year(SAFRA_REF) * 12 + month(SAFRA_REF) AS m
+            FROM keys
+        ),
+        grid AS (
+            SELECT
+                coalesce(h.ID_CLIENTE, p.ID_CLIENTE) AS ID_CLIENTE,
+                coalesce(h.m, p.m) AS m,
+                p.m IS NOT NULL AS is_pair,
+                h.* EXCLUDE (ID_CLIENTE, m)
+            FROM monthly h FULL OUTER JOIN pairs p
+                ON h.ID_CLIENTE = p.ID_CLIENTE AND h.m = p.m
+        ),
+        windowed AS (
+            SELECT
+                ID_CLIENTE, m, is_pair,
+                {aggs},
+                regr_slope(tx_mes, x) OVER ({all_frame}) AS trend,
+                count(tx_mes) OVER ({all_frame}) AS n_meses,
+                max(CASE WHEN s_tgt > 0 THEN m END) OVER ({all_frame}) AS m_ult_default
+            FROM grid
+        ),
+        features AS (
+            SELECT
+                ID_CLIENTE, m,
+                {feats},
+                CASE WHEN n_meses >= 3 THEN trend END AS TREND_DEFAULT,
+                m - m_ult_default AS MESES_DESDE_ULTIMO_DEFAULT
+            FROM windowed
+            WHERE is_pair
+        )
+        SELECT f.* EXCLUDE (ID_CLIENTE, m)
+        FROM keys k
+        LEFT JOIN features f
+            ON k.ID_CLIENTE = f.ID_CLIENTE
+            AND year(k.SAFRA_REF) * 12 + month(k.SAFRA_REF) = f.m
+        ORDER BY k._row
+        """,
+        keys=keys, **frames,
+    )
+
+    behavioral = behavioral.astype(float)
+    behavioral.index = transactions_df.index
+    return behavioral
+
+
+def assert_backend_parity(transactions_df, history_df, cadastral, info, rtol=1e-6):
+    """Verifica que os backends pandas e DuckDB geram a mesma matriz de features.
+
+    Compara valores com tolerância rtol (somas em ordem diferente) e ignora
+    diferenças de dtype inteiro/float nas colunas comportamentais.
+
+    Raises:
+        AssertionError: Se as matrizes divergirem
+    """
+    from src.feature_engineering import build_full_feature_matrix
+
+    expected = build_full_feature_matrix(
+        transactions_df, history_df, cadastral, info, verbose=False, backend="pandas"
+    )
+    result = build_full_feature_matrix(
+        transactions_df, history_df, cadastral, info, verbose=False, backend="duckdb"
+    )
+
+    # Pandas só cria colunas de janelas que aparecem em pelo menos um par
+    missing = set(expected.columns) - set(result.columns)
+    assert not missing, f"Colunas ausentes no backend duckdb: {sorted(missing)}"
+    extra = [c for c in result.columns if c not in expected.columns]
+    assert result[extra].isna().all().all(), f"Colunas extras não vazias: {extra}"
+
+    pd.testing.assert_frame_equal(
+        result[expected.columns], expected,
+        check_dtype=False, check_exact=False, rtol=rtol,
+    )
@@ -0,0 +1,293 @@
+"""Comparação concorrente de modelos com pré-processamento compartilhado.
+
+Cada fold da expanding window CV é pré-processado uma única vez (um
+ColumnTransformer por tipo de modelo) e os arrays resultantes são
+compartilhados entre os candidatos. Os modelos rodam em paralelo (threads),
+cada um com um orçamento explícito de threads, para que LightGBM/XGBoost não
+disputem os mesmos núcleos.
+"""
+import os
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import lightgbm as lgb
+import xgboost as xgb
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler, OrdinalEncoder
+from threadpoolctl import threadpool_limits
+from src.config import RANDOM_SEED
+from src.model_utils import (
+    evaluate_binary_proba, expanding_window_cv, EXPANDING_CV_FOLDS, plot_model_comparison
+)
+
+
+def build_preprocessor(numeric_features, categorical_features, kind="tree"):
+    """ColumnTransformer usado nos notebooks.
+
+    Args:
+        kind: "linear" (imputação + StandardScaler) ou "tree" (apenas imputação)
+    """
+    if kind == "linear":
+        numeric_transformer = Pipeline([
+            ("imputer", SimpleImputer(strategy="median")),
+            ("scaler", StandardScaler()),
+        ])
+    elif kind == "tree":
+        numeric_transformer = SimpleImputer(strategy="median")
+    else:
+        raise ValueError(f"Tipo de pré-processamento desconhecido: {kind!r}")
+
+    categorical_transformer = Pipeline([
+        ("imputer", SimpleImputer(strategy="constant", fill_value="MISSING")),
+        ("encoder", OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1)),
+    ])
+
+    return ColumnTransformer(
+        transformers=[
+            ("num", numeric_transformer, numeric_features),
+            ("cat", categorical_transformer, categorical_features),
+        ],
+        remainder="drop",
+    )
+
+
+def _build_logreg(n_jobs, y_train):
+    return LogisticRegression(
+        class_weight="balanced", max_iter=1000, random_state=RANDOM_SEED, C=1.0
+    )
+
+
+def _fit_logreg(model, X_train, y_train, X_val, y_val):
+    model.fit(X_train, y_train)
+
+
+def _build_lgbm(n_jobs, y_train):
+    return lgb.LGBMClassifier(
+        n_estimators=1000, learning_rate=0.05, num_leaves=31, max_depth=-1,
+        min_child_samples=20, is_unbalance=True, random_state=RANDOM_SEED,
+        verbose=-1, n_jobs=n_jobs,
+    )
+
+
+def _fit_lgbm(model, X_train, y_train, X_val, y_val):
+    model.fit(
+        X_train, y_train,
+        eval_set=[(X_val, y_val)],
+        callbacks=[lgb.early_stopping(50, verbose=False)],
+    )
+
+
+def _build_xgb(n_jobs, y_train):
+    n_pos = y_train.sum()
+    n_neg = len(y_train) - n_pos
+    return xgb.XGBClassifier(
+        n_estimators=1000, learning_rate=0.05, max_depth=6, min_child_weight=5,
+        scale_pos_weight=n_neg / n_pos, random_state=RANDOM_SEED,
+        eval_metric="logloss", verbosity=0, n_jobs=n_jobs,
+    )
+
+
+def _fit_xgb(model, X_train, y_train, X_val, y_val):
+    model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+
+
+# Candidatos do notebook 02. "threads": orçamento fixo; None = divide o restante
+DEFAULT_CANDIDATES = {
+    "LogReg": {"build": _build_logreg, "fit": _fit_logreg,
+               "preprocessing": "linear", "threads": 1},
+    "LightGBM": {"build": _build_lgbm, "fit": _fit_lgbm,
+                 "preprocessing": "tree", "threads": None},
+    "XGBoost": {"build": _build_xgb, "fit": _fit_xgb,
+                "preprocessing": "tree", "threads": None},
+}
+
+
+def allocate_threads(candidates, total_threads=None):
+    """Distribui o orçamento de threads entre os candidatos.
+
+    Candidatos com "threads" definido recebem esse valor (limitado ao total);
+    os demais dividem o restante, com a sobra da divisão distribuída em
+    round-robin. Todo candidato recebe ao menos 1 thread, então a soma pode
+    exceder o total quando há mais candidatos que núcleos (ver _max_workers).
+
+    Returns:
+        dict {nome: n_threads}
+    """
+    total_threads = total_threads or os.cpu_count()
+    fixed = {
+        name: min(c["threads"], total_threads)
+        for name, c in candidates.items() if c.get("threads")
+    }
+    flexible = [name for name in candidates if name not in fixed]
+
+    budget = dict(fixed)
+    remaining = max(total_threads - sum(fixed.values()), 0)
+    for i, name in enumerate(flexible):
+        share = remaining // len(flexible) + (1 if i < remaining % len(flexible) else 0)
+        budget[name] = max(share, 1)
+    return {name: budget[name] for name in candidates}
+
+
+def _max_workers(budget, total_threads):
+    """Maior número de modelos simultâneos cujo pior caso cabe em total_threads."""
+    sizes = sorted(budget.values(), reverse=True)
+    workers = 0
+    while workers < len(sizes) and sum(sizes[:workers + 1]) <= total_threads:
+        workers += 1
+    return max(workers, 1)
+
+
+def preprocess_folds(df, numeric_features, categorical_features, folds=None, kinds=("tree",)):
+    """Pré-processa cada fold uma única vez por tipo de pré-processamento.
+
+    Returns:
+        Lista de dicts {fold, X_train: {kind: array}, y_train, X_val: {kind: array}, y_val}
+    """
+    folds = folds or EXPANDING_CV_FOLDS
+    features = numeric_features + categorical_features
+
+    prepared = []
+    for fold_num, df_train, df_val in expanding_window_cv(df, folds):
+        X_train, X_val = {}, {}
+        for kind in kinds:
+            preprocessor = build_preprocessor(numeric_features, categorical_features, kind)
+            X_train[kind] = preprocessor.fit_transform(df_train[features])
+            X_val[kind] = preprocessor.transform(df_val[features])
+        prepared.append({
+            "fold": fold_num,
+            "X_train": X_train, "y_train": df_train["TARGET"].to_numpy(),
+            "X_val": X_val, "y_val": df_val["TARGET"].to_numpy(),
+        })
+    return prepared
+
+
+def _run_candidate(name, candidate, prepared_folds, n_jobs):
+    """Treina e avalia um candidato em todos os folds (arrays compartilhados)."""
+    kind = candidate["preprocessing"]
+    rows = []
+    t0 = time.perf_counter()
+    for fold in prepared_folds:
+        model = candidate["build"](n_jobs, fold["y_train"])
+        candidate["fit"](model, fold["X_train"][kind], fold["y_train"],
+                         fold["X_val"][kind], fold["y_val"])
+        y_prob = model.predict_proba(fold["X_val"][kind])[:, 1]
+        metrics = evaluate_binary_proba(fold["y_val"], y_prob, verbose=False)
+        rows.append({"Modelo": name, "Fold": fold["fold"], **metrics})
+    return rows, time.perf_counter() - t0
+
+
+def _run_sequential_baseline(df, numeric_features, categorical_features, folds,
+                             candidates, total_threads):
+    """Fluxo do notebook 02: modelos em sequência, todos com todos os núcleos.
+
+    Como no notebook, o pré-processamento de árvore é feito uma vez e
+    reaproveitado pelos boosters; o linear é feito para a LogReg.
+    """
+    t0 = time.perf_counter()
+    prepared = {}
+    for name, candidate in candidates.items():
+        kind = candidate["preprocessing"]
+        if kind not in prepared:
+            prepared[kind] = preprocess_folds(
+                df, numeric_features, categorical_features, folds, kinds=(kind,)
+            )
+        _run_candidate(name, candidate, prepared[kind], total_threads)
+    return time.perf_counter() - t0
+
+
+def compare_models(df, numeric_features, categorical_features, folds=None,
+                   candidates=None, total_threads=None, run_baseline=False,
+                   baseline_first=True, verbose=True, plot=True, save_path=None):
+    """Compara candidatos na expanding window CV, em paralelo.
+
+    Args:
+        df: Matriz de features com SAFRA_REF e TARGET
+        numeric_features: Colunas numéricas
+        categorical_features: Colunas categóricas
+        folds: Configuração dos folds (padrão: EXPANDING_CV_FOLDS)
+        candidates: Dict {nome: {build, fit, preprocessing, threads}}
+            (padrão: DEFAULT_CANDIDATES)
+        total_threads: Orçamento total de threads (padrão: todos os núcleos)
+        run_baseline: Se True, também mede o fluxo sequencial do notebook 02
+        baseline_first: Se True, o baseline roda antes da versão concorrente
+            (caches aquecidos não favorecem a versão concorrente)
+        verbose: Se True, imprime tempos e métricas
+        plot: Se True, plota as métricas médias com plot_model_comparison
+        save_path: Caminho para salvar o gráfico
+
+    Returns:
+        dict com:
+            results: {modelo: métricas médias nos folds} (entrada de plot_model_comparison)
+            fold_metrics: DataFrame com métricas por modelo e fold
+            timing: tempos em segundos (e speedup, se run_baseline)
+    """
+    folds = folds or EXPANDING_CV_FOLDS
+    candidates = candidates or DEFAULT_CANDIDATES
+    total_threads = total_threads or os.cpu_count()
+    budget = allocate_threads(candidates, total_threads)
+    max_workers = _max_workers(budget, total_threads)
+    if max_workers < len(candidates):
+        warnings.warn(
+            f"Orçamento de threads {budget} excede {total_threads} núcleos; "
+            f"executando no máximo {max_workers} modelo(s) por vez."
+        )
+    kinds = tuple(sorted({c["preprocessing"] for c in candidates.values()}))
+
+    def baseline():
+        return _run_sequential_baseline(
+            df, numeric_features, categorical_features, folds, candidates, total_threads
+        )
+
+    timing = {}
+    if run_baseline and baseline_first:
+        timing["sequencial_s"] = baseline()
+
+    # BLAS limitado a 1 thread: o paralelismo vem dos modelos concorrentes
+    with threadpool_limits(limits=1, user_api="blas"):
+        t0 = time.perf_counter()
+        prepared = preprocess_folds(df, numeric_features, categorical_features, folds, kinds)
+        preprocess_s = time.perf_counter() - t0
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                name: executor.submit(_run_candidate, name, c, prepared, budget[name])
+                for name, c in candidates.items()
+            }
+            outputs = {name: f.result() for name, f in futures.items()}
+        total_s = time.perf_counter() - t0
+
+    fold_metrics = pd.DataFrame([row for rows, _ in outputs.values() for row in rows])
+    results = (
+        fold_metrics.drop(columns="Fold").groupby("Modelo", sort=False).mean().to_dict("index")
+    )
+
+    timing.update({
+        "preprocessamento_s": preprocess_s,
+        "modelos_s": {name: secs for name, (_, secs) in outputs.items()},
+        "total_s": total_s,
+    })
+    if run_baseline:
+        if not baseline_first:
+            timing["sequencial_s"] = baseline()
+        timing["speedup"] = timing["sequencial_s"] / total_s
+
+    if verbose:
+        print(f"Threads por modelo: {budget} (total {total_threads}, "
+              f"até {max_workers} modelos simultâneos)")
+        print(f"Pré-processamento: {preprocess_s:.1f}s ({len(prepared)} folds x {len(kinds)} tipos)")
+        for name, secs in timing["modelos_s"].items():
+            print(f"  {name:<12}: {secs:.1f}s")
+        print(f"Tempo total (concorrente): {total_s:.1f}s")
+        if run_baseline:
+            print(f"Tempo total (sequencial):  {timing['sequencial_s']:.1f}s "
+                  f"(speedup {timing['speedup']:.2f}x)")
+        print(pd.DataFrame(results).T.round(4).to_string())
+
+    if plot:
+        plot_model_comparison(results, save_path=save_path)
+
+    return {"results": results, "fold_metrics": fold_metrics, "timing": timing}
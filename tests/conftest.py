@@ -0,0 +1,65 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.feature_engineering import create_target  # noqa: E402
+
+
+@pytest.fixture
+def bases():
+    """Bases sintéticas pequenas no formato de data_loader (após create_target).
+
+    Inclui VALOR_A_PAGAR e DATA_PAGAMENTO nulos (inclusive grupos cliente-safra
+    inteiros sem valor) e clientes ausentes do cadastral e do info.
+    """
+    rng = np.random.default_rng(0)
+    n_clients, n_rows = 60, 4000
+    safras = pd.date_range("2018-08-01", "2021-06-01", freq="MS")
+
+    safra = rng.choice(safras, n_rows)
+    emissao = safra + pd.to_timedelta(rng.integers(0, 28, n_rows), unit="D")
+    vencimento = emissao + pd.to_timedelta(rng.integers(5, 60, n_rows), unit="D")
+    pagamento = vencimento + pd.to_timedelta(rng.integers(-10, 20, n_rows), unit="D")
+    pag = pd.DataFrame({
+        "ID_CLIENTE": rng.integers(0, n_clients, n_rows),
+        "SAFRA_REF": safra,
+        "DATA_EMISSAO_DOCUMENTO": emissao,
+        "DATA_VENCIMENTO": vencimento,
+        "DATA_PAGAMENTO": pagamento,
+        "VALOR_A_PAGAR": rng.gamma(2, 1000, n_rows).round(2),
+        "TAXA": rng.choice([4.99, 5.99, 6.99, 8.99, 11.99], n_rows),
+    })
+    pag.loc[rng.random(n_rows) < 0.05, "DATA_PAGAMENTO"] = pd.NaT
+    pag.loc[rng.random(n_rows) < 0.05, "VALOR_A_PAGAR"] = np.nan
+    # Cliente 0 sem nenhum valor: grupos cliente-safra inteiramente nulos
+    pag.loc[pag["ID_CLIENTE"] == 0, "VALOR_A_PAGAR"] = np.nan
+    pag = create_target(pag)
+
+    # Clientes >= 55 fora do cadastral; info só para clientes pares
+    ids = np.arange(55)
+    cadastral = pd.DataFrame({
+        "ID_CLIENTE": ids,
+        "DATA_CADASTRO": pd.Timestamp("2015-01-01")
+        + pd.to_timedelta(rng.integers(0, 1000, len(ids)), unit="D"),
+        "DDD": rng.choice([11, 21, 41, 99, np.nan], len(ids)),
+        "CEP_2_DIG": rng.integers(10, 99, len(ids)),
+        "PORTE": rng.choice(["PEQUENO", "MEDIO", None], len(ids)),
+        "SEGMENTO_INDUSTRIAL": rng.choice(["Comércio", "Serviços"], len(ids)),
+        "DOMINIO_EMAIL": rng.choice(["GMAIL", "YAHOO"], len(ids)),
+    })
+    info = pd.DataFrame(
+        [(c, s) for c in range(0, n_clients, 2) for s in safras],
+        columns=["ID_CLIENTE", "SAFRA_REF"],
+    )
+    info["RENDA_MES_ANTERIOR"] = np.where(
+        rng.random(len(info)) < 0.1, np.nan, rng.gamma(2, 1e5, len(info))
+    )
+    info["NO_FUNCIONARIOS"] = np.where(
+        rng.random(len(info)) < 0.1, np.nan, rng.integers(50, 200, len(info))
+    )
+    return pag, cadastral, info
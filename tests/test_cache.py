@@ -0,0 +1,129 @@
+import importlib
+import sys
+import textwrap
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src import feature_engineering_sql
+from src.cache import StageCache, _function_source
+from src.feature_engineering import build_full_feature_matrix, build_transaction_features
+
+
+STAGE_MODULE = '''
+def _helper(x):
+    return x + {delta}
+
+
+def stage(df):
+    return df.assign(B=[_helper(v) for v in df["A"]])
+'''
+
+
+def _write_stage_module(root, delta):
+    (root / "cachepkg").mkdir(exist_ok=True)
+    (root / "cachepkg" / "__init__.py").write_text("")
+    (root / "cachepkg" / "stages.py").write_text(textwrap.dedent(STAGE_MODULE.format(delta=delta)))
+
+
+def test_stage_hit_returns_same_result(tmp_path, bases):
+    pag, cadastral, info = bases
+    cache = StageCache(tmp_path, verbose=False)
+
+    first = build_full_feature_matrix(pag, pag, cadastral, info, verbose=False, cache=cache)
+    second = build_full_feature_matrix(pag, pag, cadastral, info, verbose=False, cache=cache)
+
+    pd.testing.assert_frame_equal(first, second)
+    stats = cache.summary()
+    assert stats.loc["src.feature_engineering.build_behavioral_features", "hits"] == 1
+    assert stats.loc["TOTAL", "misses"] == 5
+
+
+def test_stats_keyed_by_module(tmp_path, bases):
+    pag, cadastral, info = bases
+    cache = StageCache(tmp_path, verbose=False)
+
+    build_full_feature_matrix(pag, pag, cadastral, info, verbose=False, cache=cache)
+    build_full_feature_matrix(pag, pag, cadastral, info, verbose=False, cache=cache,
+                              backend="duckdb")
+
+    stats = cache.summary()
+    assert "src.feature_engineering.build_behavioral_features" in stats.index
+    assert "src.feature_engineering_sql.build_behavioral_features" in stats.index
+
+
+def test_function_source_follows_comprehensions():
+    source = _function_source(feature_engineering_sql.build_behavioral_features)
+    assert "def _window_sql" in source
+
+
+def test_helper_change_in_comprehension_changes_key(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    # Remove os módulos gerados mesmo se o teste falhar
+    monkeypatch.delitem(sys.modules, "cachepkg.stages", raising=False)
+    monkeypatch.delitem(sys.modules, "cachepkg", raising=False)
+    cache = StageCache(tmp_path / "cache", verbose=False)
+    df = pd.DataFrame({"A": [1, 2, 3]})
+
+    _write_stage_module(tmp_path, delta=1)
+    stages = importlib.import_module("cachepkg.stages")
+    key_before = cache._key(stages.stage, (df,), None)
+
+    _write_stage_module(tmp_path, delta=2)
+    stages = importlib.reload(stages)
+    key_after = cache._key(stages.stage, (df,), None)
+
+    assert key_before != key_after
+
+
+def test_oversized_entry_is_not_persisted(tmp_path, bases, monkeypatch):
+    pag = bases[0]
+    cache = StageCache(tmp_path, verbose=False)
+    cache.run(build_transaction_features, pag.head(10))
+    assert len(list(tmp_path.glob("*.pkl"))) == 1
+
+    cache.max_bytes = cache.size_bytes() + 1
+    written = []
+    original_write = Path.write_bytes
+    monkeypatch.setattr(Path, "write_bytes",
+                        lambda self, data: written.append(self) or original_write(self, data))
+    result = cache.run(build_transaction_features, pag)
+
+    assert len(result) == len(pag)
+    assert len(list(tmp_path.glob("*.pkl"))) == 1
+    assert not list(tmp_path.glob("*.tmp"))
+    # Nada é escrito em disco para uma entrada maior que o orçamento
+    assert written == []
+
+
+def test_corrupt_entry_is_recomputed(tmp_path, bases):
+    pag = bases[0]
+    cache = StageCache(tmp_path, verbose=False)
+    expected = cache.run(build_transaction_features, pag)
+    entry = next(tmp_path.glob("*.pkl"))
+    entry.write_bytes(entry.read_bytes()[:100])
+
+    result = cache.run(build_transaction_features, pag)
+
+    pd.testing.assert_frame_equal(result, expected)
+    row = cache.summary().loc["src.feature_engineering.build_transaction_features"]
+    assert row["misses"] == 2 and row["hits"] == 0
+    # A entrada foi regravada e volta a ser usada
+    cache.run(build_transaction_features, pag)
+    assert cache.stats["src.feature_engineering.build_transaction_features"]["hits"] == 1
+
+
+def test_summary_reports_hash_time(tmp_path, bases):
+    pag = bases[0]
+    cache = StageCache(tmp_path, verbose=False)
+    cache.run(build_transaction_features, pag)
+    cache.run(build_transaction_features, pag)
+
+    stats = cache.summary()
+    row = stats.loc["src.feature_engineering.build_transaction_features"]
+    assert row["hits"] == 1 and row["misses"] == 1
+    assert row["hash_s"] > 0 and row["load_s"] > 0 and row["write_s"] > 0
+    # Um miss e um hit: economia = cálculo evitado - leitura - 2 hashes - escrita
+    expected = row["compute_s"] - row["load_s"] - row["hash_s"] - row["write_s"]
+    assert row["saved_s"] == pytest.approx(expected)
@@ -0,0 +1,79 @@
+import duckdb
+import numpy as np
+import pandas as pd
+
+from src import feature_engineering, feature_engineering_sql
+from src.feature_engineering import build_full_feature_matrix
+from src.feature_engineering_sql import assert_backend_parity, build_behavioral_features
+
+
+def _shuffled_transactions(pag, seed=1):
+    """Amostra de transações de várias safras, embaralhada e com índice não sequencial."""
+    tx = pag.sample(frac=0.5, random_state=seed)
+    tx.index = tx.index * 7 + 1000
+    return tx
+
+
+def test_parity_full_history(bases):
+    pag, cadastral, info = bases
+    assert_backend_parity(_shuffled_transactions(pag), pag, cadastral, info)
+
+
+def test_parity_clients_missing_from_history(bases):
+    pag, cadastral, info = bases
+    history = pag[pag["ID_CLIENTE"] % 3 != 0]
+    assert_backend_parity(_shuffled_transactions(pag), history, cadastral, info)
+
+
+def test_parity_history_file(tmp_path, bases):
+    pag, cadastral, info = bases
+    path = tmp_path / "history.parquet"
+    duckdb.from_df(pag).write_parquet(str(path))
+    tx = _shuffled_transactions(pag)
+
+    expected = build_full_feature_matrix(tx, pag, cadastral, info, verbose=False)
+    result = build_full_feature_matrix(tx, path, cadastral, info, verbose=False,
+                                       backend="duckdb")
+    pd.testing.assert_frame_equal(result[expected.columns], expected,
+                                  check_dtype=False, check_exact=False, rtol=1e-6)
+
+
+def test_null_valor_group_sums_to_zero(bases):
+    pag, cadastral, info = bases
+    tx = pag[pag["ID_CLIENTE"] == 0]
+    result = build_full_feature_matrix(tx, pag, cadastral, info, verbose=False,
+                                       backend="duckdb")
+    assert (result["SOMA_VALOR_MES"] == 0).all()
+    assert result["MEDIA_VALOR_MES"].isna().all()
+
+
+def test_behavioral_index_matches_transactions(bases):
+    pag, cadastral, info = bases
+    tx = _shuffled_transactions(pag)
+
+    result = build_behavioral_features(tx, pag)
+    assert result.index.equals(tx.index)
+    assert np.isfinite(result["HIST_ALL_QTD_TRANS"].dropna()).all()
+
+
+def test_parity_null_keys(bases):
+    pag, cadastral, info = bases
+    tx = _shuffled_transactions(pag)
+    tx["ID_CLIENTE"] = tx["ID_CLIENTE"].astype(float)
+    tx.iloc[::11, tx.columns.get_loc("ID_CLIENTE")] = np.nan
+    tx.iloc[::13, tx.columns.get_loc("SAFRA_REF")] = pd.NaT
+    # Chaves nulas também do lado direito: o merge do pandas as casa entre si
+    cadastral = pd.concat([cadastral, cadastral.head(1).assign(ID_CLIENTE=np.nan)])
+    info = pd.concat([info, info.head(1).assign(SAFRA_REF=pd.NaT)])
+
+    for stage, args in [
+        ("build_safra_context_features", (tx,)),
+        ("build_cadastral_features", (tx, cadastral)),
+        ("build_info_features", (tx, info)),
+    ]:
+        expected = getattr(feature_engineering, stage)(*args)
+        result = getattr(feature_engineering_sql, stage)(*args)
+        pd.testing.assert_frame_equal(
+            result[expected.columns], expected.reset_index(drop=True),
+            check_dtype=False, check_exact=False, rtol=1e-6, obj=stage,
+        )
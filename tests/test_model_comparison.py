@@ -0,0 +1,73 @@
+import lightgbm as lgb
+import pytest
+
+from src import model_comparison
+from src.config import CATEGORICAL_FEATURES, NUMERIC_FEATURES_BASE
+from src.feature_engineering import build_full_feature_matrix
+from src.model_comparison import (
+    DEFAULT_CANDIDATES, _max_workers, allocate_threads, compare_models
+)
+
+
+def _build_small_lgbm(n_jobs, y_train):
+    return lgb.LGBMClassifier(n_estimators=20, verbose=-1, n_jobs=n_jobs)
+
+
+FAST_CANDIDATES = {
+    "LogReg": DEFAULT_CANDIDATES["LogReg"],
+    "LightGBM": {**DEFAULT_CANDIDATES["LightGBM"], "build": _build_small_lgbm},
+    "LightGBM_2": {**DEFAULT_CANDIDATES["LightGBM"], "build": _build_small_lgbm},
+}
+
+FOLDS = [
+    {"train_end": "2019-12-01", "val_start": "2020-01-01", "val_end": "2020-06-01"},
+    {"train_end": "2020-06-01", "val_start": "2020-07-01", "val_end": "2020-12-01"},
+]
+
+
+@pytest.mark.parametrize("total", [3, 4, 8, 16])
+def test_allocate_threads_uses_whole_budget(total):
+    budget = allocate_threads(DEFAULT_CANDIDATES, total)
+    assert sum(budget.values()) == total
+    assert budget["LogReg"] == 1
+    assert abs(budget["LightGBM"] - budget["XGBoost"]) <= 1
+
+
+def test_allocate_threads_remainder_round_robin():
+    assert allocate_threads(DEFAULT_CANDIDATES, 8) == {"LogReg": 1, "LightGBM": 4, "XGBoost": 3}
+
+
+def test_max_workers_respects_total():
+    budget = allocate_threads(DEFAULT_CANDIDATES, 1)
+    assert _max_workers(budget, 1) == 1
+    assert _max_workers(budget, 2) == 2
+    assert _max_workers(allocate_threads(DEFAULT_CANDIDATES, 8), 8) == 3
+
+
+def test_compare_models_with_baseline(bases, monkeypatch):
+    pag, cadastral, info = bases
+    df = build_full_feature_matrix(pag, pag, cadastral, info, verbose=False)
+    behavioral = [c for c in df.columns
+                  if c.startswith("HIST_") or c in ["TREND_DEFAULT", "MESES_DESDE_ULTIMO_DEFAULT"]]
+    numeric = [c for c in NUMERIC_FEATURES_BASE + behavioral if c in df.columns]
+    categorical = [c for c in CATEGORICAL_FEATURES if c in df.columns]
+
+    calls = []
+    original = model_comparison.preprocess_folds
+
+    def counting_preprocess(*args, **kwargs):
+        calls.append(kwargs.get("kinds", args[4] if len(args) > 4 else None))
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(model_comparison, "preprocess_folds", counting_preprocess)
+
+    with pytest.warns(UserWarning):
+        out = compare_models(df, numeric, categorical, folds=FOLDS,
+                             candidates=FAST_CANDIDATES, total_threads=2,
+                             run_baseline=True, verbose=False, plot=False)
+
+    assert set(out["results"]) == set(FAST_CANDIDATES)
+    assert len(out["fold_metrics"]) == len(FAST_CANDIDATES) * len(FOLDS)
+    assert out["timing"]["speedup"] > 0
+    # Baseline: linear + uma única vez o de árvore; concorrente: os dois de uma vez
+    assert calls == [("linear",), ("tree",), ("linear", "tree")]